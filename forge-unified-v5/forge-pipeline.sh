@@ -86,15 +86,13 @@ log "Stage 1: Static QA Gate..."
 python3 "$GATES_DIR/static_gate.py" "$CRATE_PATH" "$OUTPUT_DIR/static.json"
 STATIC_EXIT=$?
 
-# Stage 2: Architecture Compliance
+# Stages 2-3: Architecture Compliance + Pattern Matching (one shared read of src/)
 log "Stage 2: Architecture Compliance Gate..."
-python3 "$GATES_DIR/arch_gate.py" "$CRATE_PATH" "$OUTPUT_DIR/arch.json"
-ARCH_EXIT=$?
-
-# Stage 3: Pattern Matching
 log "Stage 3: Pattern Matching Gate..."
-python3 "$GATES_DIR/pattern_gate.py" "$CRATE_PATH" "$CANONICAL_DIR" "$OUTPUT_DIR/pattern.json"
-PATTERN_EXIT=$?
+python3 "$GATES_DIR/scan_gates.py" "$CRATE_PATH" "$CANONICAL_DIR" \
+    "$OUTPUT_DIR/arch.json" \
+    "$OUTPUT_DIR/pattern.json"
+SCAN_EXIT=$?
 
 # Stage 4: Aggregation
 log "Stage 4: Aggregating results..."
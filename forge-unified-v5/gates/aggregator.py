@@ -11,12 +11,14 @@ Combines:
 Output: qa.report.json with final grade
 """
 
-import json
 import sys
 import os
+import time
+from operator import mul
 from dataclasses import dataclass, asdict, field
 from typing import List, Dict, Optional
-from datetime import datetime, timezone
+
+from gate_io import json_dumps, json_loads, write_report
 
 @dataclass
 class Dimension:
@@ -52,7 +54,11 @@ THRESHOLDS = {
     "D": 40,
 }
 
-def grade_from_score(score: int) -> str:
+# Weight vector in the order dimensions are summed
+_DIMENSIONS = ("structure", "complexity", "arch", "pattern")
+_WEIGHT_VECTOR = tuple(WEIGHTS[name] for name in _DIMENSIONS)
+
+def _grade(score: int) -> str:
     if score >= THRESHOLDS["A"]:
         return "A"
     if score >= THRESHOLDS["B"]:
@@ -63,11 +69,19 @@ def grade_from_score(score: int) -> str:
         return "D"
     return "F"
 
+# Grade letter for every score 0-100, so grading is a single index
+_GRADE_TABLE = bytes(ord(_grade(score)) for score in range(101))
+
+def grade_from_score(score: int) -> str:
+    return chr(_GRADE_TABLE[max(0, min(100, score))])
+
 def load_json(path: str) -> dict:
     if not os.path.exists(path):
         return {}
-    with open(path, 'r') as f:
-        return json.load(f)
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+LOADSET_ID_FORMAT = "qa-%Y%m%d-%H%M%S"
 
 def aggregate(static_path: str, arch_path: str, pattern_path: str, crate_name: str) -> QaReport:
     """Aggregate all gate outputs into final report"""
@@ -107,10 +121,7 @@ def aggregate(static_path: str, arch_path: str, pattern_path: str, crate_name: s
     )
     
     # Calculate weighted score
-    total_score = sum(
-        dim.score * dim.weight 
-        for dim in dimensions.values()
-    )
+    total_score = sum(map(mul, (dimensions[name].score for name in _DIMENSIONS), _WEIGHT_VECTOR))
     score = int(round(total_score))
     grade = grade_from_score(score)
     
@@ -133,7 +144,7 @@ def aggregate(static_path: str, arch_path: str, pattern_path: str, crate_name: s
         if v.get("severity") in ("critical", "high"):
             directives.append(f"FIX: {v.get('message', 'Unknown violation')}")
     
-    loadset_id = f"qa-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}"
+    loadset_id = time.strftime(LOADSET_ID_FORMAT, time.gmtime())
     
     return QaReport(
         loadset_id=loadset_id,
@@ -172,8 +183,7 @@ def run_aggregator(static_path: str, arch_path: str, pattern_path: str, output_p
         "refactor_directives": report.refactor_directives,
     }
     
-    with open(output_path, 'w') as fp:
-        json.dump(output, fp, indent=2)
+    write_report(output_path, json_dumps(output))
     
     status = "✅ PASS" if report.pass_ else "❌ FAIL"
     print(f"\n{'='*50}")
@@ -12,13 +12,17 @@ Checks:
 Output: arch.findings.json
 """
 
-import json
 import re
 import sys
-import os
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Tuple
-from datetime import datetime, timezone
+import time
+from array import array
+from bisect import bisect_right
+from operator import mul
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+from crate_snapshot import CrateSnapshot, detect_layer, map_file, map_files, rust_sources
+from gate_io import json_dumps, write_report
 
 @dataclass
 class Violation:
@@ -28,6 +32,44 @@ class Violation:
     line: int
     message: str
 
+# Severity code -> score penalty; codes index SEVERITY_WEIGHTS
+SEVERITIES = ('critical', 'high', 'medium')
+SEVERITY_WEIGHTS = (25, 15, 5)
+_SEVERITY_CODE = {name: i for i, name in enumerate(SEVERITIES)}
+
+@dataclass
+class ViolationTable:
+    """Violations as parallel columns, one row per violation"""
+    codes: List[str] = field(default_factory=list)
+    severities: array = field(default_factory=lambda: array('B'))  # SEVERITIES index
+    files: List[str] = field(default_factory=list)
+    lines: array = field(default_factory=lambda: array('I'))
+    messages: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def add_rows(self, filepath: str, rows: List[Tuple[str, int, int, str]]):
+        """Append one file's (code, severity code, line, message) rows"""
+        if not rows:
+            return
+        codes, severities, lines, messages = zip(*rows)
+        self.codes.extend(codes)
+        self.severities.extend(severities)
+        self.files.extend([filepath] * len(rows))
+        self.lines.extend(lines)
+        self.messages.extend(messages)
+
+    def severity_counts(self) -> List[int]:
+        """Number of violations per SEVERITIES entry"""
+        return [self.severities.count(i) for i in range(len(SEVERITIES))]
+
+    def to_json_list(self) -> List[dict]:
+        return [
+            {"code": c, "severity": SEVERITIES[s], "file": f, "line": l, "message": m}
+            for c, s, f, l, m in zip(self.codes, self.severities, self.files, self.lines, self.messages)
+        ]
+
 @dataclass
 class ArchReport:
     schema_version: str = "1.0"
@@ -38,144 +80,166 @@ class ArchReport:
     tcr_compliant: bool = True
     rune_valid: bool = True
     slot_valid: bool = True
-    violations: List[Violation] = None
+    violations: ViolationTable = None
     
     def __post_init__(self):
         if self.violations is None:
-            self.violations = []
+            self.violations = ViolationTable()
 
 # Forbidden patterns with error codes
 # Only match actual imports, not comments
 FORBIDDEN = [
-    (r'use bevy::', 'E9127-001', 'critical', 'bevy import forbidden - use sx9_ecs_prelude'),
-    (r'use bevy_ecs::', 'E9127-001', 'critical', 'bevy_ecs import forbidden - use sx9_ecs_prelude'),
-    (r'bevy::prelude::\*', 'E9127-001', 'critical', 'bevy prelude forbidden'),
+    (rb'use bevy::', 'E9127-001', 'critical', 'bevy import forbidden - use sx9_ecs_prelude'),
+    (rb'use bevy_ecs::', 'E9127-001', 'critical', 'bevy_ecs import forbidden - use sx9_ecs_prelude'),
+    (rb'bevy::prelude::\*', 'E9127-001', 'critical', 'bevy prelude forbidden'),
 ]
 
+# Checks run over raw UTF-8 bytes, where \b and \w only know ASCII. Word
+# boundaries are spelled out with [\w\x80-\xff] instead, so the bytes of a
+# non-ASCII character count as part of an identifier (éString is not String).
+
 # L2 layer violations
 L2_FORBIDDEN = [
-    (r'\basync\s+fn\b', 'E9127-003', 'high', 'async forbidden in L2 layer'),
-    (r'\.await\b', 'E9127-003', 'high', 'await forbidden in L2 layer'),
-    (r'\bString\b', 'E9127-004', 'medium', 'String in hot-path - prefer &str or integers'),
+    (rb'(?<![\w\x80-\xff])async\s+fn(?![\w\x80-\xff])', 'E9127-003', 'high', 'async forbidden in L2 layer'),
+    (rb'\.await(?![\w\x80-\xff])', 'E9127-003', 'high', 'await forbidden in L2 layer'),
+    (rb'(?<![\w\x80-\xff])String(?![\w\x80-\xff])', 'E9127-004', 'medium', 'String in hot-path - prefer &str or integers'),
 ]
 
 # Type checks - only flag incorrect types
 TYPE_CHECKS = [
     # These patterns look for INCORRECT type definitions
-    (r'type\s+RuneId\s*=\s*(char|String|&str|i32|i64|u8|u16)', 'E9127-011', 'high', 'RuneId must be u32'),
-    (r'type\s+SlotId\s*=\s*(char|String|&str|i32|i64|u8|u16|u32)', 'E9127-012', 'high', 'SlotId must be u64'),
-    (r'rune:\s*(?:char|String|&str)\b', 'E9127-021', 'high', 'Rune must be u32, not char/String'),
+    (rb'type\s+RuneId\s*=\s*(char|String|&str|i32|i64|u8|u16)', 'E9127-011', 'high', 'RuneId must be u32'),
+    (rb'type\s+SlotId\s*=\s*(char|String|&str|i32|i64|u8|u16|u32)', 'E9127-012', 'high', 'SlotId must be u64'),
+    (rb'rune:\s*(?:char|String|&str)(?![\w\x80-\xff])', 'E9127-021', 'high', 'Rune must be u32, not char/String'),
 ]
 
-def detect_layer(content: str) -> Optional[str]:
-    """Detect ECS layer from imports"""
-    if 'use apecs::' in content or 'async fn' in content:
-        return 'L1'
-    if 'use legion::' in content or 'sx9_ecs_prelude' in content:
-        return 'L2'
-    if 'use atlas::' in content or 'nats::' in content:
-        return 'L3'
-    return None
-
-def check_file(filepath: str, content: str, layer: Optional[str]) -> List[Violation]:
-    """Check a single file for violations"""
-    violations = []
-    lines = content.split('\n')
+def _compile_checks(checks: list, rank: int) -> List[Tuple[re.Pattern, tuple]]:
+    """Compile a check list -> [(pattern, (rank, code, severity code, message))].
+
+    Each check keeps its own pattern, so re can use its literal-prefix fast
+    scan; rank preserves list order when violations are emitted.
+    """
+    return [
+        (re.compile(pattern), (rank + i, code, _SEVERITY_CODE[severity], message))
+        for i, (pattern, code, severity, message) in enumerate(checks)
+    ]
+
+_FORBIDDEN_COMPILED = _compile_checks(FORBIDDEN, 0)
+_L2_COMPILED = _compile_checks(L2_FORBIDDEN, len(FORBIDDEN))
+_TYPE_COMPILED = _compile_checks(TYPE_CHECKS, len(FORBIDDEN) + len(L2_FORBIDDEN))
+
+# Lines whose stripped text starts with //, /* or *
+_COMMENT_LINE_RE = re.compile(rb'^[^\S\n]*(?://|/\*|\*)', re.MULTILINE)
+_NEWLINE_RE = re.compile(rb'\n')
+
+# Every check's match contains one of these literals, so a file without any
+# of them is clean (the common case) and skips the regex passes entirely
+_CHEAP_TRIGGERS = (b'bevy', b'async', b'.await', b'String', b'RuneId', b'SlotId', b'rune:')
+
+def _check_triggers():
+    """Fail at import if a check does not spell out any _CHEAP_TRIGGERS literal.
+
+    A check without one would silently never run on files lacking the other
+    literals. Escaped punctuation is unescaped first, so ``\\.await`` counts.
+    """
+    for pattern, code, _, message in FORBIDDEN + L2_FORBIDDEN + TYPE_CHECKS:
+        literal_text = re.sub(rb'\\(\W)', rb'\1', pattern)
+        if not any(t in literal_text for t in _CHEAP_TRIGGERS):
+            raise ValueError(f"{code} ({message}) contains none of _CHEAP_TRIGGERS; add its literal")
+
+_check_triggers()
+
+def _check_rows(content: bytes, layer: Optional[str]) -> List[Tuple[str, int, int, str]]:
+    """Check one file's content -> (code, severity code, line, message) rows"""
+    if all(content.find(t) == -1 for t in _CHEAP_TRIGGERS):
+        return []
+    
+    checks = _FORBIDDEN_COMPILED + _TYPE_COMPILED
+    if layer == 'L2':
+        checks = checks + _L2_COMPILED
     
-    for i, line in enumerate(lines, 1):
-        # Skip comments
-        stripped = line.strip()
-        if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*'):
-            continue
-        
-        # Check forbidden patterns
-        for pattern, code, severity, message in FORBIDDEN:
-            if re.search(pattern, line):
-                violations.append(Violation(
-                    code=code,
-                    severity=severity,
-                    file=filepath,
-                    line=i,
-                    message=message
-                ))
-        
-        # Check L2-specific violations
-        if layer == 'L2':
-            for pattern, code, severity, message in L2_FORBIDDEN:
-                if re.search(pattern, line):
-                    violations.append(Violation(
-                        code=code,
-                        severity=severity,
-                        file=filepath,
-                        line=i,
-                        message=message
-                    ))
-        
-        # Check type definitions
-        for pattern, code, severity, message in TYPE_CHECKS:
-            if re.search(pattern, line):
-                violations.append(Violation(
-                    code=code,
-                    severity=severity,
-                    file=filepath,
-                    line=i,
-                    message=message
-                ))
+    # One pass per check over the whole file; checks are line-scoped, so drop
+    # any hit that spans a newline and keep one hit per line per check
+    hits = []
+    for pattern, check in checks:
+        for m in pattern.finditer(content):
+            start, end = m.span()
+            if content.find(b'\n', start, end) == -1:
+                hits.append((start, check))
+    if not hits:
+        return []
     
-    return violations
+    line_starts = [0]
+    line_starts.extend(m.end() for m in _NEWLINE_RE.finditer(content))
+    comment_lines = {bisect_right(line_starts, m.start()) for m in _COMMENT_LINE_RE.finditer(content)}
+    
+    found = {(bisect_right(line_starts, start), check) for start, check in hits}
+    return [
+        (code, severity, line, message)
+        for line, (_, code, severity, message) in sorted(found)
+        if line not in comment_lines
+    ]
+
+def check_file(filepath: str, content: Union[str, bytes], layer: Optional[str]) -> List[Violation]:
+    """Check a single file (str, bytes or a read-only mmap) for violations"""
+    content = content.encode() if isinstance(content, str) else content
+    return [
+        Violation(code=code, severity=SEVERITIES[severity], file=filepath, line=line, message=message)
+        for code, severity, line, message in _check_rows(content, layer)
+    ]
+
+def _scan_file(filepath: str) -> Tuple[Optional[str], List[Tuple[str, int, int, str]]]:
+    """Map one file read-only and check it -> (layer, violation rows)"""
+    with map_file(filepath) as content:
+        layer = detect_layer(content)
+        return layer, _check_rows(content, layer)
 
-def scan_crate(crate_path: str) -> Tuple[List[Violation], Optional[str]]:
-    """Scan entire crate for violations"""
-    all_violations = []
+def _check_content(task: Tuple[bytes, Optional[str]]) -> List[Tuple[str, int, int, str]]:
+    """Check one snapshot (content, layer) task -> violation rows"""
+    return _check_rows(*task)
+
+def scan_crate(crate_path: str, snapshot: Optional[CrateSnapshot] = None) -> Tuple[ViolationTable, Optional[str]]:
+    """Scan entire crate for violations, from the snapshot if one is given"""
+    all_violations = ViolationTable()
     detected_layer = None
-    src_path = os.path.join(crate_path, "src")
     
-    if not os.path.exists(src_path):
-        return all_violations, None
+    if snapshot is not None:
+        rel_paths = [rel_path for rel_path, _ in snapshot.files]
+        tasks = [(content, layer) for (_, content), layer in zip(snapshot.files, snapshot.layers)]
+        results = zip(snapshot.layers, map_files(_check_content, tasks))
+    else:
+        sources = list(rust_sources(crate_path))
+        rel_paths = [rel_path for _, rel_path in sources]
+        results = map_files(_scan_file, [path for path, _ in sources])
     
-    for root, _, files in os.walk(src_path):
-        for f in files:
-            if not f.endswith('.rs'):
-                continue
-            filepath = os.path.join(root, f)
-            rel_path = os.path.relpath(filepath, crate_path)
-            
-            with open(filepath, 'r') as fp:
-                content = fp.read()
-            
-            layer = detect_layer(content)
-            if layer and not detected_layer:
-                detected_layer = layer
-            
-            violations = check_file(rel_path, content, layer)
-            all_violations.extend(violations)
+    # Rows go straight into the table's columns; no Violation objects are built
+    for rel_path, (layer, rows) in zip(rel_paths, results):
+        if layer and not detected_layer:
+            detected_layer = layer
+        all_violations.add_rows(rel_path, rows)
     
     return all_violations, detected_layer
 
-def calculate_score(violations: List[Violation]) -> int:
+def calculate_score(violations: ViolationTable) -> int:
     """Calculate compliance score"""
-    score = 100
-    for v in violations:
-        if v.severity == 'critical':
-            score -= 25
-        elif v.severity == 'high':
-            score -= 15
-        elif v.severity == 'medium':
-            score -= 5
-    return max(0, score)
-
-def run_gate(crate_path: str, output_path: str) -> int:
+    penalty = sum(map(mul, violations.severity_counts(), SEVERITY_WEIGHTS))
+    return max(0, 100 - penalty)
+
+LOADSET_ID_FORMAT = "arch-%Y%m%d-%H%M%S"
+
+def run_gate(crate_path: str, output_path: str, snapshot: Optional[CrateSnapshot] = None) -> int:
     """Main gate execution"""
-    loadset_id = f"arch-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}"
+    loadset_id = time.strftime(LOADSET_ID_FORMAT, time.gmtime())
     
-    violations, ecs_layer = scan_crate(crate_path)
+    violations, ecs_layer = scan_crate(crate_path, snapshot)
     score = calculate_score(violations)
     
     # Determine flags
-    bevy_free = not any(v.code == 'E9127-001' for v in violations)
-    tcr_compliant = not any(v.code.startswith('E9127-01') for v in violations)
-    rune_valid = not any(v.code in ('E9127-011', 'E9127-021') for v in violations)
-    slot_valid = not any(v.code == 'E9127-012' for v in violations)
+    codes = set(violations.codes)
+    bevy_free = 'E9127-001' not in codes
+    tcr_compliant = not any(c.startswith('E9127-01') for c in codes)
+    rune_valid = codes.isdisjoint(('E9127-011', 'E9127-021'))
+    slot_valid = 'E9127-012' not in codes
     
     report = ArchReport(
         loadset_id=loadset_id,
@@ -197,11 +261,10 @@ def run_gate(crate_path: str, output_path: str) -> int:
         "tcr_compliant": report.tcr_compliant,
         "rune_valid": report.rune_valid,
         "slot_valid": report.slot_valid,
-        "violations": [asdict(v) for v in report.violations]
+        "violations": report.violations.to_json_list()
     }
     
-    with open(output_path, 'w') as fp:
-        json.dump(output, fp, indent=2)
+    write_report(output_path, json_dumps(output))
     
     status = "✓" if bevy_free else "✗"
     print(f"{status} Arch Compliance: score={score} layer={ecs_layer} bevy_free={bevy_free}")
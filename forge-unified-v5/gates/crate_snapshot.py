@@ -0,0 +1,88 @@
+"""
+Crate Snapshot - Shared Source Read
+Part of Unified Forge Pipeline
+
+Walks a crate's src/ once and keeps every .rs file's bytes, so the
+architecture and pattern gates can scan the same content in one process
+without each re-walking and re-reading the tree. Also holds the file
+mapping and process-pool fan-out both gates use when scanning from disk.
+"""
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# Below this many files, process pool startup costs more than the scan itself
+PARALLEL_MIN_FILES = 4
+
+def rust_sources(crate_path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (abs_path, rel_path) for every .rs file under src/, in walk order"""
+    for root, _, names in os.walk(os.path.join(crate_path, "src")):
+        for f in names:
+            if f.endswith('.rs'):
+                filepath = os.path.join(root, f)
+                yield filepath, os.path.relpath(filepath, crate_path)
+
+@contextmanager
+def map_file(filepath: str):
+    """Map a file read-only; empty files, which mmap rejects, yield b''.
+
+    Gates scanning from disk map each file inside their workers, so reads
+    overlap with scanning and only paths and plain result rows cross the
+    pipe. Search the mapping with find() rather than `in`: on an mmap,
+    `in` only tests single bytes.
+    """
+    with open(filepath, 'rb') as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            yield content
+
+def map_files(fn: Callable, tasks: list) -> list:
+    """Apply fn to every file task, across processes once there are enough"""
+    # Regex scanning is CPU-bound, so spread files across processes (GIL-free);
+    # with a single CPU the pool is pure overhead
+    workers = min(os.cpu_count() or 1, len(tasks))
+    if len(tasks) < PARALLEL_MIN_FILES or workers <= 1:
+        return [fn(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(fn, tasks, chunksize=16))
+
+def detect_layer(content: bytes) -> Optional[str]:
+    """Detect ECS layer from imports"""
+    def has(marker: bytes) -> bool:
+        return content.find(marker) != -1
+
+    if has(b'use apecs::') or has(b'async fn'):
+        return 'L1'
+    if has(b'use legion::') or has(b'sx9_ecs_prelude'):
+        return 'L2'
+    if has(b'use atlas::') or has(b'nats::'):
+        return 'L3'
+    return None
+
+@dataclass
+class CrateSnapshot:
+    """Every .rs file's content, read once; gates given a snapshot scan this
+    instead of mapping files from disk"""
+    crate_path: str
+    files: List[Tuple[str, bytes]] = field(default_factory=list)  # (rel_path, content), walk order
+
+    @classmethod
+    def scan(cls, crate_path: str) -> "CrateSnapshot":
+        """Walk src/ once and read every .rs file"""
+        files = []
+        for filepath, rel_path in rust_sources(crate_path):
+            with open(filepath, 'rb') as fp:
+                files.append((rel_path, fp.read()))
+        return cls(crate_path=crate_path, files=files)
+
+    @cached_property
+    def layers(self) -> List[Optional[str]]:
+        """ECS layer detected in each file, parallel to files"""
+        return [detect_layer(content) for _, content in self.files]
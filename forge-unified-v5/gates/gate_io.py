@@ -0,0 +1,38 @@
+"""
+Gate I/O - Shared Report Serialization
+Part of Unified Forge Pipeline
+
+JSON loading, report serialization and report writing used by every
+gate and the aggregator. orjson parses and serializes (dataclasses
+natively) several times faster, so it is used when installed; stdlib
+json is the fallback.
+"""
+
+import json
+import os
+from dataclasses import asdict
+
+try:
+    import orjson
+    # Its decode error subclasses json.JSONDecodeError, so callers catch one type
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> bytes:
+        """Serialize to indented JSON bytes"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj) -> bytes:
+        """Serialize to indented JSON bytes"""
+        return json.dumps(obj, indent=2, default=asdict).encode()
+
+def write_report(path: str, data: bytes):
+    """Write report bytes to a raw fd, normally in one write() call"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:  # write() may accept only part of a large buffer
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
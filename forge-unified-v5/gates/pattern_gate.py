@@ -11,13 +11,33 @@ Matches code against canonical N-V-N-N blocks:
 Output: pattern.matches.json
 """
 
-import json
 import re
 import sys
-import os
-from dataclasses import dataclass, asdict, field
-from typing import List, Dict, Optional
-from datetime import datetime, timezone
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+
+from crate_snapshot import CrateSnapshot, map_file, map_files, rust_sources
+from gate_io import json_dumps, write_report
+
+# Optional regex engines: Hyperscan for the multi-pattern positive scan, RE2 for
+# linear-time single patterns. Both fall back to stdlib re.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Optional Aho-Corasick automaton for the literal prescreen in front of re/RE2
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 @dataclass
 class Candidate:
@@ -41,95 +61,378 @@ class PatternReport:
     score: int = 0
     matches: List[Match] = field(default_factory=list)
 
-# Canonical block signatures for matching
+# Canonical block signatures for matching. Patterns run over raw UTF-8 bytes,
+# where \w only knows ASCII, so identifiers are matched with [\w\x80-\xff] to
+# keep the bytes of non-ASCII characters inside them.
 CANONICAL_SIGNATURES = {
     "USER_VALIDATE_INPUT_SECURITY": {
         "category": "validation",
         "patterns": [
-            r'fn\s+validate',
-            r'Result<.*,\s*\w*Error>',
-            r'if\s+\w+\.is_empty\(\)',
+            rb'fn\s+validate',
+            rb'Result<.*,\s*[\w\x80-\xff]*Error>',
+            rb'if\s+[\w\x80-\xff]+\.is_empty\(\)',
         ],
         "constraints": ["deterministic", "no_io", "single_responsibility"],
-        "anti_patterns": [r'println!', r'eprintln!', r'std::io', r'tokio::fs'],
+        "anti_patterns": [rb'println!', rb'eprintln!', rb'std::io', rb'tokio::fs'],
     },
     "SYSTEM_WRITE_IDEMPOTENT_RECORD": {
         "category": "persistence",
         "patterns": [
-            r'fn\s+write|fn\s+save|fn\s+persist',
-            r'idempotent|upsert|insert_or_update',
+            rb'fn\s+write|fn\s+save|fn\s+persist',
+            rb'idempotent|upsert|insert_or_update',
         ],
         "constraints": ["deterministic", "no_logging"],
-        "anti_patterns": [r'println!', r'log::'],
+        "anti_patterns": [rb'println!', rb'log::'],
     },
     "WORKER_PROCESS_TASK_BOUNDED": {
         "category": "concurrency",
         "patterns": [
-            r'fn\s+process|fn\s+handle|fn\s+execute',
-            r'bounded|limit|max_',
+            rb'fn\s+process|fn\s+handle|fn\s+execute',
+            rb'bounded|limit|max_',
         ],
         "constraints": ["deterministic", "bounded"],
-        "anti_patterns": [r'loop\s*\{[^}]*\}(?![^}]*break)'],  # Unbounded loops
+        "anti_patterns": [rb'loop\s*\{[^}]*\}(?![^}]*break)'],  # Unbounded loops
     },
     "SERVICE_ROTATE_TOKEN_SECURE": {
         "category": "security",
         "patterns": [
-            r'fn\s+rotate|fn\s+refresh|fn\s+renew',
-            r'token|secret|credential',
+            rb'fn\s+rotate|fn\s+refresh|fn\s+renew',
+            rb'token|secret|credential',
         ],
         "constraints": ["deterministic", "no_logging"],
-        "anti_patterns": [r'println!.*token', r'dbg!.*secret'],
+        "anti_patterns": [rb'println!.*token', rb'dbg!.*secret'],
     },
     "RESOURCE_CLOSE_GRACEFUL": {
         "category": "lifecycle",
         "patterns": [
-            r'fn\s+close|fn\s+shutdown|fn\s+cleanup',
-            r'Drop|drop|dispose',
+            rb'fn\s+close|fn\s+shutdown|fn\s+cleanup',
+            rb'Drop|drop|dispose',
         ],
         "constraints": ["graceful"],
-        "anti_patterns": [r'panic!', r'unwrap\(\)(?!\s*//\s*safe)'],
+        "anti_patterns": [rb'panic!', rb'unwrap\(\)(?!\s*//\s*safe)'],
     },
     "SERVICE_ADAPTER_IO_WRAPPER": {
         "category": "design",
         "patterns": [
-            r'trait\s+\w+Adapter|impl\s+\w+Adapter',
-            r'wrap|delegate|proxy',
+            rb'trait\s+[\w\x80-\xff]+Adapter|impl\s+[\w\x80-\xff]+Adapter',
+            rb'wrap|delegate|proxy',
         ],
         "constraints": ["declares_side_effects"],
         "anti_patterns": [],
     },
 }
 
-def extract_functions(content: str) -> List[tuple]:
-    """Extract function names and their bodies"""
-    pattern = r'(pub\s+)?fn\s+(\w+)[^{]*\{([^}]*(?:\{[^}]*\}[^}]*)*)\}'
-    matches = re.findall(pattern, content, re.DOTALL)
-    return [(m[1], m[2]) for m in matches]
+@lru_cache(maxsize=None)
+def _compile(pattern: bytes, caseless: bool = False):
+    """Compile with RE2 when available; patterns RE2 rejects (lookaround) use re"""
+    if re2 is not None:
+        options = re2.Options()
+        # Match bytes, as re does; in UTF-8 mode [\x80-\xff] would mean code points
+        options.encoding = re2.Options.Encoding.LATIN1
+        options.case_sensitive = not caseless
+        options.log_errors = False
+        try:
+            return re2.compile(pattern, options)
+        except re2.error:
+            pass
+    return re.compile(pattern, re.IGNORECASE if caseless else 0)
+
+# Every signature compiled once at import:
+# pattern_id -> (positive regexes, [(violation message, anti-pattern regex)])
+_SIGNATURE_RES = {
+    pattern_id: (
+        [_compile(p, True) for p in sig["patterns"]],
+        [(f"violates: {ap[:30].decode()}", _compile(ap)) for ap in sig["anti_patterns"]],
+    )
+    for pattern_id, sig in CANONICAL_SIGNATURES.items()
+}
+
+def _build_positive_db():
+    """Compile all positive patterns into one Hyperscan database.
+
+    Expression ids are ``signature_index * 100 + pattern_index``.
+    """
+    expressions, ids = [], []
+    for sig_idx, sig in enumerate(CANONICAL_SIGNATURES.values()):
+        for pat_idx, pattern in enumerate(sig["patterns"]):
+            expressions.append(pattern)
+            ids.append(sig_idx * 100 + pat_idx)
+    db = hyperscan.Database()
+    db.compile(
+        expressions=expressions,
+        ids=ids,
+        elements=len(expressions),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions),
+    )
+    return db
+
+_POSITIVE_DB = _build_positive_db() if hyperscan is not None else None
+
+def _required_literals(pattern: bytes) -> Optional[List[bytes]]:
+    """Lowercased literals, one per top-level branch, that any match must contain.
+
+    Each branch contributes its longest run of plain characters (escaped
+    punctuation counts; classes, wildcards and quantified characters break a
+    run). Returns None when no prescreen is safe: the pattern has groups or
+    counted repeats, or some branch has no literal at all.
+    """
+    if re.search(rb'(?<!\\)[({]', pattern):
+        return None
+    literals = []
+    runs, run = [], bytearray()
+    i = 0
+    while True:
+        c = pattern[i:i + 1]
+        if c in (b'', b'|'):  # end of a top-level branch
+            runs.append(bytes(run))
+            literal = max(runs, key=len)
+            if not literal:
+                return None
+            literals.append(literal.lower())
+            if not c:
+                return literals
+            runs, run = [], bytearray()
+            i += 1
+            continue
+        if c == b'\\':
+            escaped = pattern[i + 1:i + 2]
+            i += 2
+            if escaped.isalnum():  # \s, \w, \b, ...
+                runs.append(bytes(run))
+                run.clear()
+            else:
+                run += escaped
+        elif c == b'[':
+            # Skip the class; a ] right after [ or [^ is literal
+            i += 1
+            if pattern[i:i + 1] == b'^':
+                i += 1
+            if pattern[i:i + 1] == b']':
+                i += 1
+            while pattern[i:i + 1] != b']':
+                i += 2 if pattern[i:i + 1] == b'\\' else 1
+            i += 1
+            runs.append(bytes(run))
+            run.clear()
+        elif c in b'*+?':
+            if run:
+                run.pop()  # the quantified character may be absent or repeated
+            runs.append(bytes(run))
+            run.clear()
+            i += 1
+        elif c in b'.^$':
+            runs.append(bytes(run))
+            run.clear()
+            i += 1
+        else:
+            run += c
+            i += 1
+
+def _build_prescreen():
+    """Map each prescreen literal to the (signature, pattern) indexes needing it.
+
+    Also returns the indexes that cannot be screened and always run.
+    """
+    literals: Dict[bytes, List[Tuple[int, int]]] = {}
+    unscreened = set()
+    for sig_idx, sig in enumerate(CANONICAL_SIGNATURES.values()):
+        for pat_idx, pattern in enumerate(sig["patterns"]):
+            required = _required_literals(pattern)
+            if required is None:
+                unscreened.add((sig_idx, pat_idx))
+                continue
+            for literal in required:
+                literals.setdefault(literal, []).append((sig_idx, pat_idx))
+    automaton = None
+    if ahocorasick is not None:
+        # The automaton takes str keys; latin-1 maps bytes 1:1 onto code points
+        automaton = ahocorasick.Automaton()
+        for literal, keys in literals.items():
+            automaton.add_word(literal.decode('latin-1'), keys)
+        automaton.make_automaton()
+    return literals, frozenset(unscreened), automaton
+
+_PRESCREEN_LITERALS, _UNSCREENED, _PRESCREEN_AUTOMATON = _build_prescreen()
+
+def prescreen(full_text: bytes) -> set:
+    """(signature, pattern) indexes whose required literals occur in the text"""
+    # Patterns are matched case-insensitively, and bytes IGNORECASE is ASCII-only
+    lowered = full_text.lower()
+    candidates = set(_UNSCREENED)
+    if _PRESCREEN_AUTOMATON is not None:
+        # One pass over the text for every literal at once
+        for _, keys in _PRESCREEN_AUTOMATON.iter(lowered.decode('latin-1')):
+            candidates.update(keys)
+    else:
+        for literal, keys in _PRESCREEN_LITERALS.items():
+            if literal in lowered:
+                candidates.update(keys)
+    return candidates
+
+def _build_scanners():
+    """Generate straight-line scanners specialized on CANONICAL_SIGNATURES.
+
+    The signatures are fixed, so every pattern check is unrolled into its own
+    statement against a prebound compiled pattern. That drops the dict,
+    enumerate and generator dispatch of looping over the signatures per
+    function. Returns (positive_scan, anti_scan):
+
+    - positive_scan(text, candidates) -> hits per signature, checking only
+      the (signature, pattern) indexes in candidates (see prescreen)
+    - anti_scan(text, hits) -> anti-pattern messages per signature, checking
+      only signatures with positive hits
+    """
+    namespace = {}
+    positive = ["def positive_scan(text, candidates):"]
+    anti = ["def anti_scan(text, hits):"]
+    for sig_idx, (positive_res, anti_res) in enumerate(_SIGNATURE_RES.values()):
+        positive.append(f"    h{sig_idx} = 0")
+        for pat_idx, regex in enumerate(positive_res):
+            name = f"_p{sig_idx}_{pat_idx}"
+            namespace[name] = regex
+            positive.append(f"    if {(sig_idx, pat_idx)!r} in candidates and {name}.search(text):")
+            positive.append(f"        h{sig_idx} += 1")
+        anti.append(f"    f{sig_idx} = []")
+        if anti_res:
+            anti.append(f"    if hits[{sig_idx}]:")
+        for ap_idx, (message, regex) in enumerate(anti_res):
+            name = f"_a{sig_idx}_{ap_idx}"
+            namespace[name] = regex
+            anti.append(f"        if {name}.search(text):")
+            anti.append(f"            f{sig_idx}.append({message!r})")
+    n = len(CANONICAL_SIGNATURES)
+    positive.append(f"    return [{', '.join(f'h{i}' for i in range(n))}]")
+    anti.append(f"    return [{', '.join(f'f{i}' for i in range(n))}]")
+    exec("\n".join(positive + anti), namespace)
+    return namespace["positive_scan"], namespace["anti_scan"]
+
+_positive_scan, _anti_scan = _build_scanners()
+
+def positive_hits(full_text: bytes) -> List[int]:
+    """Count matching positive patterns per signature, in CANONICAL_SIGNATURES order"""
+    if _POSITIVE_DB is None:
+        # Only patterns whose literals are present can match, so skip the rest
+        return _positive_scan(full_text, prescreen(full_text))
+    
+    # One scan over the text for every signature at once
+    matched = set()
+    _POSITIVE_DB.scan(full_text, match_event_handler=lambda id_, *_: matched.add(id_))
+    hits = [0] * len(CANONICAL_SIGNATURES)
+    for id_ in matched:
+        hits[id_ // 100] += 1
+    return hits
+
+# Function header up to its opening brace. A `;` outside [...] ends the match,
+# so bodiless trait methods are skipped instead of swallowing the next body.
+# Bytes >= 0x80 are identifier characters, so `fn café` is captured whole.
+_FN_HEADER_RE = re.compile(rb'(?<![\w\x80-\xff])fn\s+([\w\x80-\xff]+)(?:[^{;\[]|\[[^\]]*\])*\{')
+
+# Everything that matters while matching braces: the braces themselves, plus
+# comments and literals whose contents must not be counted
+_BODY_TOKEN_RE = re.compile(rb'''
+    (?P<open>\{)
+  | (?P<close>\})
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<raw_string>\bb?r(?P<hashes>\#*)")
+  | (?P<string>"(?:\\.|[^"\\])*")
+  | (?P<char>'(?:\\(?:x[0-9a-fA-F]{2}|u\{[0-9a-fA-F]{1,6}\}|.)|[^\\'\n])')
+''', re.VERBOSE | re.DOTALL)
+
+# Rust block comments nest
+_BLOCK_COMMENT_RE = re.compile(rb'/\*|\*/')
+
+def _find_block_end(content: bytes, open_pos: int) -> int:
+    """Index of the } closing the { at open_pos, or -1 if unbalanced"""
+    depth = 0
+    pos = open_pos
+    while True:
+        m = _BODY_TOKEN_RE.search(content, pos)
+        if m is None:
+            return -1
+        kind = m.lastgroup
+        pos = m.end()
+        if kind == 'open':
+            depth += 1
+        elif kind == 'close':
+            depth -= 1
+            if depth == 0:
+                return m.start()
+        elif kind == 'block_comment':
+            nesting = 1
+            while nesting:
+                c = _BLOCK_COMMENT_RE.search(content, pos)
+                if c is None:
+                    return -1
+                nesting += 1 if c.group() == b'/*' else -1
+                pos = c.end()
+        elif kind == 'raw_string':
+            terminator = b'"' + m.group('hashes')
+            end = content.find(terminator, pos)
+            if end == -1:
+                return -1
+            pos = end + len(terminator)
+
+def extract_functions(content: bytes) -> List[tuple]:
+    """Extract function names (str) and their bodies (bytes).
+
+    Linear scan: locate each header, then count braces to its matching close,
+    skipping comments and string/char literals.
+    """
+    functions = []
+    pos = 0
+    while True:
+        m = _FN_HEADER_RE.search(content, pos)
+        if m is None:
+            return functions
+        open_pos = m.end() - 1
+        close_pos = _find_block_end(content, open_pos)
+        if close_pos == -1:
+            pos = m.end()
+            continue
+        functions.append((m.group(1).decode(errors='replace'), content[open_pos + 1:close_pos]))
+        # Nested fns stay part of their parent's body
+        pos = close_pos + 1
+
+# Candidates scoring below this are dropped
+MIN_CANDIDATE_CONFIDENCE = 0.3
+
+def anti_pattern_violations(full_text: bytes, pattern_id: str) -> List[str]:
+    """List the anti-patterns of a signature found in the text"""
+    return [message for message, regex in _SIGNATURE_RES[pattern_id][1] if regex.search(full_text)]
+
+def _score_one(pattern_matches, n_patterns, n_violations):
+    """Score one function against one signature -> (confidence, structural, semantic)"""
+    structural_score = min(1.0, pattern_matches / n_patterns)
+    # Penalize for violations
+    semantic_score = max(0.0, 1.0 - n_violations * 0.2)
+    confidence = structural_score * 0.6 + semantic_score * 0.4
+    return confidence, structural_score, semantic_score
+
+def function_text(func_name: str, func_body: bytes) -> bytes:
+    """Text the signatures are matched against"""
+    return b"fn " + func_name.encode() + b" " + func_body
 
-def match_pattern(func_name: str, func_body: str, pattern_id: str, sig: dict) -> Optional[Candidate]:
-    """Check if function matches a canonical pattern"""
-    full_text = f"fn {func_name} {func_body}"
+def match_pattern(func_name: str, func_body: bytes, pattern_id: str, sig: dict,
+                  pattern_matches: Optional[int] = None) -> Optional[Candidate]:
+    """Check if function matches a canonical pattern.
+
+    ``pattern_matches`` takes a precomputed positive hit count (see positive_hits).
+    """
+    full_text = function_text(func_name, func_body)
     
     # Check positive patterns
-    pattern_matches = sum(1 for p in sig["patterns"] if re.search(p, full_text, re.IGNORECASE))
+    if pattern_matches is None:
+        pattern_matches = sum(1 for regex in _SIGNATURE_RES[pattern_id][0] if regex.search(full_text))
     if pattern_matches == 0:
         return None
     
-    structural_score = min(1.0, pattern_matches / len(sig["patterns"]))
-    
     # Check anti-patterns (violations)
-    violations = []
-    for ap in sig["anti_patterns"]:
-        if re.search(ap, full_text):
-            violations.append(f"violates: {ap[:30]}")
-    
-    # Penalize for violations
-    violation_penalty = len(violations) * 0.2
-    semantic_score = max(0, 1.0 - violation_penalty)
-    
-    confidence = (structural_score * 0.6 + semantic_score * 0.4)
+    violations = anti_pattern_violations(full_text, pattern_id)
+    confidence, structural_score, semantic_score = _score_one(
+        pattern_matches, len(sig["patterns"]), len(violations))
     
-    if confidence < 0.3:
+    if confidence < MIN_CANDIDATE_CONFIDENCE:
         return None
     
     return Candidate(
@@ -154,41 +457,64 @@ def classify(candidates: List[Candidate]) -> str:
         return "PARTIAL_MATCH"
     return "NO_MATCH"
 
-def scan_crate(crate_path: str, registry_path: str) -> List[Match]:
-    """Scan crate and match against canonical patterns"""
+def _scan_content(content: bytes) -> List[Tuple[str, List[int], List[List[str]]]]:
+    """Collect hits for each function in one file's content.
+
+    Returns (func_name, positive hits, anti-pattern messages) per function,
+    with hits and messages given per signature.
+    """
+    rows = []
+    for func_name, func_body in extract_functions(content):
+        full_text = function_text(func_name, func_body)
+        hits = positive_hits(full_text)
+        # Anti-patterns only matter where the signature matched at all
+        rows.append((func_name, hits, _anti_scan(full_text, hits)))
+    return rows
+
+def _scan_file(filepath: str) -> List[Tuple[str, List[int], List[List[str]]]]:
+    """Map one file read-only and collect hits for its functions"""
+    with map_file(filepath) as content:
+        return _scan_content(content)
+
+def scan_crate(crate_path: str, registry_path: str, snapshot: Optional[CrateSnapshot] = None) -> List[Match]:
+    """Scan crate and match against canonical patterns, from the snapshot if one is given"""
     matches = []
-    src_path = os.path.join(crate_path, "src")
     
-    if not os.path.exists(src_path):
-        return matches
+    if snapshot is not None:
+        rel_paths = [rel_path for rel_path, _ in snapshot.files]
+        results = map_files(_scan_content, [content for _, content in snapshot.files])
+    else:
+        sources = list(rust_sources(crate_path))
+        rel_paths = [rel_path for _, rel_path in sources]
+        results = map_files(_scan_file, [path for path, _ in sources])
     
-    for root, _, files in os.walk(src_path):
-        for f in files:
-            if not f.endswith('.rs'):
-                continue
-            filepath = os.path.join(root, f)
-            rel_path = os.path.relpath(filepath, crate_path)
+    for rel_path, rows in zip(rel_paths, results):
+        for func_name, hits, found in rows:
+            candidates = []
+            for (pattern_id, sig), pattern_matches, violations in zip(CANONICAL_SIGNATURES.items(), hits, found):
+                if pattern_matches == 0:
+                    continue
+                confidence, structural_score, semantic_score = _score_one(
+                    pattern_matches, len(sig["patterns"]), len(violations))
+                if confidence < MIN_CANDIDATE_CONFIDENCE:
+                    continue
+                candidates.append(Candidate(
+                    pattern_id=pattern_id,
+                    confidence=round(confidence, 2),
+                    structural_score=round(structural_score, 2),
+                    semantic_score=round(semantic_score, 2),
+                    violations=violations
+                ))
             
-            with open(filepath, 'r') as fp:
-                content = fp.read()
+            # Sort by confidence
+            candidates.sort(key=lambda c: c.confidence, reverse=True)
             
-            functions = extract_functions(content)
-            for func_name, func_body in functions:
-                candidates = []
-                for pattern_id, sig in CANONICAL_SIGNATURES.items():
-                    candidate = match_pattern(func_name, func_body, pattern_id, sig)
-                    if candidate:
-                        candidates.append(candidate)
-                
-                # Sort by confidence
-                candidates.sort(key=lambda c: c.confidence, reverse=True)
-                
-                matches.append(Match(
-                    file=rel_path,
-                    symbol=func_name,
-                    classification=classify(candidates),
-                    candidates=candidates[:3]  # Top 3
-                ))
+            matches.append(Match(
+                file=rel_path,
+                symbol=func_name,
+                classification=classify(candidates),
+                candidates=candidates[:3]  # Top 3
+            ))
     
     return matches
 
@@ -211,11 +537,14 @@ def calculate_score(matches: List[Match]) -> int:
     
     return min(100, int((strong * 100 + partial * 50) / total))
 
-def run_gate(crate_path: str, registry_path: str, output_path: str) -> int:
+LOADSET_ID_FORMAT = "pattern-%Y%m%d-%H%M%S"
+
+def run_gate(crate_path: str, registry_path: str, output_path: str,
+             snapshot: Optional[CrateSnapshot] = None) -> int:
     """Main gate execution"""
-    loadset_id = f"pattern-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}"
+    loadset_id = time.strftime(LOADSET_ID_FORMAT, time.gmtime())
     
-    matches = scan_crate(crate_path, registry_path)
+    matches = scan_crate(crate_path, registry_path, snapshot)
     score = calculate_score(matches)
     
     report = PatternReport(
@@ -228,19 +557,10 @@ def run_gate(crate_path: str, registry_path: str, output_path: str) -> int:
         "schema_version": report.schema_version,
         "loadset_id": report.loadset_id,
         "score": report.score,
-        "matches": [
-            {
-                "file": m.file,
-                "symbol": m.symbol,
-                "classification": m.classification,
-                "candidates": [asdict(c) for c in m.candidates]
-            }
-            for m in report.matches
-        ]
+        "matches": report.matches
     }
     
-    with open(output_path, 'w') as fp:
-        json.dump(output, fp, indent=2)
+    write_report(output_path, json_dumps(output))
     
     strong_count = sum(1 for m in matches if m.classification == "STRONG_MATCH")
     print(f"✓ Pattern Match: score={score} strong={strong_count}/{len(matches)}")
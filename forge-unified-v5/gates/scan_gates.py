@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Source Scan Gates - Shared Crate Read
+Part of Unified Forge Pipeline
+
+Runs the architecture and pattern gates over one CrateSnapshot, so the
+crate's src/ is walked and read once for both.
+
+Output: arch.json, pattern.json
+"""
+
+import sys
+
+import arch_gate
+import pattern_gate
+from crate_snapshot import CrateSnapshot
+
+def run_gates(crate_path: str, registry_path: str, arch_output: str, pattern_output: str) -> int:
+    """Run both source gates over one snapshot of the crate"""
+    snapshot = CrateSnapshot.scan(crate_path)
+    arch_exit = arch_gate.run_gate(crate_path, arch_output, snapshot)
+    pattern_exit = pattern_gate.run_gate(crate_path, registry_path, pattern_output, snapshot)
+    return arch_exit or pattern_exit
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5:
+        print("Usage: scan_gates.py <crate_path> <registry_path> <arch_output> <pattern_output>")
+        sys.exit(1)
+    sys.exit(run_gates(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4]))